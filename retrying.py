@@ -16,11 +16,41 @@ import random
 import sys
 import time
 import traceback
+from functools import lru_cache
 from functools import wraps
 
 # sys.maxint / 2, since Python 3.2 doesn't have a sys.maxint...
 MAX_WAIT = 1073741823
 
+# precomputed powers of two for exponential_sleep
+_POW2 = tuple(1 << i for i in range(64))
+
+
+@lru_cache(maxsize=128)
+def _fib(n):
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+
+@lru_cache(maxsize=128)
+def _fib_attempt_cap(multiplier, maximum):
+    """
+    Return the first n where multiplier * fib(n) reaches maximum, so attempts
+    past it can be clamped instead of computing ever larger Fibonacci numbers.
+    Returns None when no such n exists because maximum is infinite.
+    """
+    if multiplier <= 0:
+        # every result is <= 0 and gets clamped to 0 anyway
+        return 0
+    if maximum == float("inf"):
+        return None
+    n, a, b = 0, 0, 1
+    while multiplier * a < maximum:
+        n, a, b = n + 1, b, a + b
+    return n
+
 
 def _retry_if_exception_of_type(retryable_types):
     def _retry_if_exception_these_types(exception):
@@ -29,11 +59,48 @@ def _retry_if_exception_of_type(retryable_types):
     return _retry_if_exception_these_types
 
 
+class _TypeErrorFromCall(Exception):
+    """Carries a TypeError raised by a cached function past _cache_results."""
+
+
+def _cache_results(f, maxsize):
+    """
+    Memoize successful results of f. Calls with unhashable arguments skip the
+    cache and go straight to f.
+    """
+
+    def call_f(*args, **kw):
+        try:
+            return f(*args, **kw)
+        except TypeError as e:
+            # keep apart from the TypeError lru_cache raises for unhashable args
+            raise _TypeErrorFromCall(e)
+
+    cached_f = lru_cache(maxsize=maxsize)(call_f)
+
+    @wraps(f)
+    def wrapped_f(*args, **kw):
+        try:
+            return cached_f(*args, **kw)
+        except _TypeErrorFromCall as e:
+            error = e.args[0]
+        except TypeError:
+            return f(*args, **kw)
+        raise error
+
+    wrapped_f.cache_info = cached_f.cache_info
+    wrapped_f.cache_clear = cached_f.cache_clear
+    return wrapped_f
+
+
 def retry(*dargs, **dkw):
     """
     Decorator function that instantiates the Retrying object
     @param *dargs: positional arguments passed to Retrying object
-    @param **dkw: keyword arguments passed to the Retrying object
+    @param **dkw: keyword arguments passed to the Retrying object, except for
+        cache (memoize successful results) and cache_size (defaults to 128).
+        The cache holds references to the arguments of each cached call,
+        including self for methods, keeping up to cache_size of them alive.
     """
     # support both @retry and @retry() as valid syntax
     if len(dargs) == 1 and callable(dargs[0]):
@@ -48,12 +115,16 @@ def retry(*dargs, **dkw):
         return wrap_simple(dargs[0])
 
     else:
+        cache = dkw.pop("cache", False)
+        cache_size = dkw.pop("cache_size", 128)
 
         def wrap(f):
             @wraps(f)
             def wrapped_f(*args, **kw):
                 return Retrying(*dargs, **dkw).call(f, *args, **kw)
 
+            if cache:
+                return _cache_results(wrapped_f, cache_size)
             return wrapped_f
 
         return wrap
@@ -80,6 +151,13 @@ def _pick_logger(logger=None):
 
 
 class Retrying(object):
+    """
+    Retrying holds the stop, wait and retry behavior for calling a function.
+    sleep_func(seconds) and time_func() replace time.sleep and time.monotonic
+    for waiting between attempts and measuring the delay since the first one,
+    e.g. to drive retries from a virtual clock in tests.
+    """
+
     def __init__(
         self,
         stop=None,
@@ -94,6 +172,10 @@ class Retrying(object):
         wait_incrementing_max=None,
         wait_exponential_multiplier=None,
         wait_exponential_max=None,
+        wait_exponential_jitter=False,
+        wait_fibonacci_multiplier=None,
+        wait_fibonacci_max=None,
+        wait_max_delay=None,
         retry_on_exception=None,
         retry_on_result=None,
         wrap_exception=False,
@@ -103,6 +185,8 @@ class Retrying(object):
         before_attempts=None,
         after_attempts=None,
         logger=None,
+        sleep_func=None,
+        time_func=None,
     ):
 
         self._stop_max_attempt_number = (
@@ -127,12 +211,26 @@ class Retrying(object):
         self._wait_incrementing_max = (
             MAX_WAIT if wait_incrementing_max is None else wait_incrementing_max
         )
+        self._wait_fibonacci_multiplier = (
+            1 if wait_fibonacci_multiplier is None else wait_fibonacci_multiplier
+        )
+        self._wait_fibonacci_max = (
+            MAX_WAIT if wait_fibonacci_max is None else wait_fibonacci_max
+        )
         self._wait_jitter_max = 0 if wait_jitter_max is None else wait_jitter_max
         self._before_attempts = before_attempts
         self._after_attempts = after_attempts
 
         self._logger = _pick_logger(logger)
 
+        # created on first use by _rng, since seeding a Random is comparatively
+        # slow and most calls never need a random number
+        self._random = None
+
+        # allow the clock to be swapped out, e.g. for a virtual one in tests
+        self._sleep = time.sleep if sleep_func is None else sleep_func
+        self._time = time.monotonic if time_func is None else time_func
+
         # TODO add chaining of stop behaviors
         # stop behavior
         stop_funcs = []
@@ -146,16 +244,24 @@ class Retrying(object):
             self.stop = stop_func
 
         elif stop is None:
-            self.stop = lambda attempts, delay: any(
-                f(attempts, delay) for f in stop_funcs
-            )
+            # As with wait below, resolve the stop condition up front rather
+            # than looping over stop_funcs after every attempt.
+            if not stop_funcs:
+                self.stop = self.never_stop
+            elif len(stop_funcs) == 1:
+                self.stop = stop_funcs[0]
+            else:
+                first, second = stop_funcs
+                self.stop = lambda attempts, delay: (
+                    first(attempts, delay) or second(attempts, delay)
+                )
 
         else:
             self.stop = getattr(self, stop)
 
         # TODO add chaining of wait behaviors
         # wait behavior
-        wait_funcs = [lambda *args, **kwargs: 0]
+        wait_funcs = []
         if wait_fixed is not None:
             wait_funcs.append(self.fixed_sleep)
 
@@ -168,27 +274,63 @@ class Retrying(object):
         ):
             wait_funcs.append(self.incrementing_sleep)
 
-        if wait_exponential_multiplier is not None or wait_exponential_max is not None:
+        if wait_exponential_jitter:
+            wait_funcs.append(self.exponential_jitter_sleep)
+
+        elif (
+            wait_exponential_multiplier is not None or wait_exponential_max is not None
+        ):
             wait_funcs.append(self.exponential_sleep)
 
+        if wait_fibonacci_multiplier is not None or wait_fibonacci_max is not None:
+            wait_funcs.append(self.fibonacci_sleep)
+
         if wait_func is not None:
             self.wait = wait_func
 
         elif wait is None:
-            self.wait = lambda attempts, delay: max(
-                f(attempts, delay) for f in wait_funcs
-            )
+            # Resolve the strategy once here so the common single-strategy case
+            # doesn't pay for building and reducing a generator on every wait.
+            if not wait_funcs:
+                self.wait = self.no_sleep
+            elif len(wait_funcs) == 1:
+                self.wait = wait_funcs[0]
+            else:
+                self.wait = lambda attempts, delay: max(
+                    0, *(f(attempts, delay) for f in wait_funcs)
+                )
 
         else:
             self.wait = getattr(self, wait)
 
+        # cap whichever wait behavior was chosen with a single min() at the end,
+        # call() applies the same cap again after adding any jitter
+        if wait_max_delay is not None and wait_max_delay < 0:
+            wait_max_delay = 0
+        self._wait_max_delay = wait_max_delay
+        if wait_max_delay is not None:
+            uncapped_wait = self.wait
+            self.wait = lambda attempts, delay: min(
+                uncapped_wait(attempts, delay), wait_max_delay
+            )
+
         # retry on exception filter
+        # exception types listed here are matched directly by the except clause
+        # in call(), which is cheaper than going through should_reject. Only
+        # Exception subclasses qualify, since call() never catches anything
+        # outside of Exception (e.g. KeyboardInterrupt or SystemExit).
+        self._retry_on_exception_types = ()
         if retry_on_exception is None:
             self._retry_on_exception = self.always_reject
         else:
             # this allows for providing a tuple of exception types that
             # should be allowed to retry on, and avoids having to create
             # a callback that does the same thing
+            if isinstance(retry_on_exception, tuple) and all(
+                isinstance(t, type) and issubclass(t, Exception)
+                for t in retry_on_exception
+            ):
+                self._retry_on_exception_types = retry_on_exception
             if isinstance(retry_on_exception, (tuple, Exception)):
                 retry_on_exception = _retry_if_exception_of_type(retry_on_exception)
             self._retry_on_exception = retry_on_exception
@@ -201,6 +343,18 @@ class Retrying(object):
 
         self._wrap_exception = wrap_exception
 
+    @property
+    def _rng(self):
+        """This Retrying's own random generator, used for random waits and jitter."""
+        if self._random is None:
+            self._random = random.Random()
+        return self._random
+
+    @staticmethod
+    def never_stop(previous_attempt_number, delay_since_first_attempt_ms):
+        """Never stop retrying."""
+        return False
+
     def stop_after_attempt(self, previous_attempt_number, delay_since_first_attempt_ms):
         """Stop after the previous attempt >= stop_max_attempt_number."""
         return previous_attempt_number >= self._stop_max_attempt_number
@@ -216,11 +370,17 @@ class Retrying(object):
 
     def fixed_sleep(self, previous_attempt_number, delay_since_first_attempt_ms):
         """Sleep a fixed amount of time between each retry."""
-        return self._wait_fixed
+        result = self._wait_fixed
+        if result < 0:
+            result = 0
+        return result
 
     def random_sleep(self, previous_attempt_number, delay_since_first_attempt_ms):
         """Sleep a random amount of time between wait_random_min and wait_random_max"""
-        return random.randint(self._wait_random_min, self._wait_random_max)
+        result = self._rng.randint(self._wait_random_min, self._wait_random_max)
+        if result < 0:
+            result = 0
+        return result
 
     def incrementing_sleep(self, previous_attempt_number, delay_since_first_attempt_ms):
         """
@@ -237,7 +397,10 @@ class Retrying(object):
         return result
 
     def exponential_sleep(self, previous_attempt_number, delay_since_first_attempt_ms):
-        exp = 2**previous_attempt_number
+        if 0 <= previous_attempt_number < 64:
+            exp = _POW2[previous_attempt_number]
+        else:
+            exp = 2**previous_attempt_number
         result = self._wait_exponential_multiplier * exp
         if result > self._wait_exponential_max:
             result = self._wait_exponential_max
@@ -245,6 +408,38 @@ class Retrying(object):
             result = 0
         return result
 
+    def exponential_jitter_sleep(
+        self, previous_attempt_number, delay_since_first_attempt_ms
+    ):
+        """
+        Sleep a random amount of time between 0 and what exponential_sleep
+        would have slept ("full jitter"), so that many callers retrying at once
+        don't all wake up together.
+        """
+        upper = self.exponential_sleep(
+            previous_attempt_number, delay_since_first_attempt_ms
+        )
+        return self._rng.uniform(0, upper)
+
+    def fibonacci_sleep(self, previous_attempt_number, delay_since_first_attempt_ms):
+        """
+        Sleep wait_fibonacci_multiplier times the Fibonacci number of the
+        previous attempt, which grows more gently than exponential_sleep.
+        """
+        n = max(previous_attempt_number, 0)
+        cap = _fib_attempt_cap(
+            self._wait_fibonacci_multiplier, self._wait_fibonacci_max
+        )
+        if cap is not None and n > cap:
+            n = cap
+        fib = _fib(n)
+        result = self._wait_fibonacci_multiplier * fib
+        if result > self._wait_fibonacci_max:
+            result = self._wait_fibonacci_max
+        if result < 0:
+            result = 0
+        return result
+
     @staticmethod
     def never_reject(result):
         return False
@@ -263,7 +458,8 @@ class Retrying(object):
         return reject
 
     def call(self, fn, *args, **kwargs):
-        start_time = int(round(time.time() * 1000))
+        start_time = int(round(self._time() * 1000))
+        retry_on_exception_types = self._retry_on_exception_types
         attempt_number = 1
         while True:
             if self._before_attempts:
@@ -271,18 +467,25 @@ class Retrying(object):
 
             try:
                 attempt = Attempt(fn(*args, **kwargs), attempt_number, False)
+            except retry_on_exception_types:
+                tb = sys.exc_info()
+                attempt = Attempt(tb, attempt_number, True)
+                reject = True
             except Exception:
                 tb = sys.exc_info()
                 attempt = Attempt(tb, attempt_number, True)
+                reject = self.should_reject(attempt)
+            else:
+                reject = self.should_reject(attempt)
 
-            if not self.should_reject(attempt):
+            if not reject:
                 return attempt.get(self._wrap_exception)
 
             self._logger.warning(attempt)
             if self._after_attempts:
                 self._after_attempts(attempt_number)
 
-            delay_since_first_attempt_ms = int(round(time.time() * 1000)) - start_time
+            delay_since_first_attempt_ms = int(round(self._time() * 1000)) - start_time
             if self.stop(attempt_number, delay_since_first_attempt_ms):
                 if not self._wrap_exception and attempt.has_exception:
                     # get() on an attempt with an exception should cause it to be raised, but raise just in case
@@ -292,10 +495,12 @@ class Retrying(object):
             else:
                 sleep = self.wait(attempt_number, delay_since_first_attempt_ms)
                 if self._wait_jitter_max:
-                    jitter = random.random() * self._wait_jitter_max
+                    jitter = self._rng.random() * self._wait_jitter_max
                     sleep = sleep + max(0, jitter)
+                    if self._wait_max_delay is not None:
+                        sleep = min(sleep, self._wait_max_delay)
                 self._logger.info(f"Retrying in {sleep / 1000.0:.2f} seconds.")
-                time.sleep(sleep / 1000.0)
+                self._sleep(sleep / 1000.0)
 
             attempt_number += 1
 
@@ -11,13 +11,18 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import functools
+import itertools
 import logging
 import random
+import statistics
 import time
 import unittest
 
 from retrying import RetryError
 from retrying import Retrying
+from retrying import _fib
+from retrying import _fib_attempt_cap
 from retrying import retry
 
 
@@ -38,6 +43,22 @@ class TestStopConditions(unittest.TestCase):
         self.assertTrue(r.stop(2, 1000))
         self.assertTrue(r.stop(2, 1001))
 
+    def test_stop_after_attempt_or_delay(self):
+        r = Retrying(stop_max_attempt_number=3, stop_max_delay=1000)
+        self.assertFalse(r.stop(2, 999))
+        self.assertTrue(r.stop(3, 999))
+        self.assertTrue(r.stop(2, 1000))
+        self.assertTrue(r.stop(4, 1001))
+
+    def test_stop_uses_overridden_methods(self):
+        class _NeverStopAfterAttempt(Retrying):
+            def stop_after_attempt(self, previous_attempt_number, delay):
+                return False
+
+        r = _NeverStopAfterAttempt(stop_max_attempt_number=3, stop_max_delay=1000)
+        self.assertFalse(r.stop(4, 999))
+        self.assertTrue(r.stop(4, 1000))
+
     def test_legacy_explicit_stop_type(self):
         Retrying(stop="stop_after_attempt")
 
@@ -57,6 +78,22 @@ class TestWaitConditions(unittest.TestCase):
         r = Retrying(wait_fixed=1000)
         self.assertEqual(1000, r.wait(12, 6546))
 
+    def test_negative_sleep_is_zero(self):
+        self.assertEqual(0, Retrying(wait_fixed=-5).wait(1, 0))
+        r = Retrying(wait_random_min=-2000, wait_random_max=-1000)
+        self.assertEqual(0, r.wait(1, 0))
+
+        calls = []
+
+        @retry(wait_fixed=-5, stop_max_attempt_number=2)
+        def _fail_once():
+            calls.append(1)
+            if len(calls) < 2:
+                raise IOError("try again")
+            return True
+
+        self.assertTrue(_fail_once())
+
     def test_incrementing_sleep(self):
         r = Retrying(wait_incrementing_start=500, wait_incrementing_increment=100)
         self.assertEqual(500, r.wait(1, 6546))
@@ -65,31 +102,21 @@ class TestWaitConditions(unittest.TestCase):
 
     def test_random_sleep(self):
         r = Retrying(wait_random_min=1000, wait_random_max=2000)
-        times = set()
-        times.add(r.wait(1, 6546))
-        times.add(r.wait(1, 6546))
-        times.add(r.wait(1, 6546))
-        times.add(r.wait(1, 6546))
-
-        # this is kind of non-deterministic...
-        self.assertTrue(len(times) > 1)
-        for t in times:
-            self.assertTrue(t >= 1000)
-            self.assertTrue(t <= 2000)
+        wait = r.wait
+        times = [wait(1, 6546) for _ in range(1000)]
+
+        self.assertGreater(statistics.pvariance(times), 0)
+        self.assertGreaterEqual(min(times), 1000)
+        self.assertLessEqual(max(times), 2000)
 
     def test_random_sleep_without_min(self):
         r = Retrying(wait_random_max=2000)
-        times = set()
-        times.add(r.wait(1, 6546))
-        times.add(r.wait(1, 6546))
-        times.add(r.wait(1, 6546))
-        times.add(r.wait(1, 6546))
-
-        # this is kind of non-deterministic...
-        self.assertTrue(len(times) > 1)
-        for t in times:
-            self.assertTrue(t >= 0)
-            self.assertTrue(t <= 2000)
+        wait = r.wait
+        times = [wait(1, 6546) for _ in range(1000)]
+
+        self.assertGreater(statistics.pvariance(times), 0)
+        self.assertGreaterEqual(min(times), 0)
+        self.assertLessEqual(max(times), 2000)
 
     def test_exponential(self):
         r = Retrying(wait_exponential_max=100000)
@@ -122,70 +149,139 @@ class TestWaitConditions(unittest.TestCase):
         self.assertEqual(r.wait(7, 0), 50000)
         self.assertEqual(r.wait(50, 0), 50000)
 
-    def test_legacy_explicit_wait_type(self):
-        Retrying(wait="exponential_sleep")
+    def test_exponential_jitter(self):
+        r = Retrying(
+            wait_exponential_multiplier=1000,
+            wait_exponential_max=50000,
+            wait_exponential_jitter=True,
+        )
+        r._rng.seed(0)
+        for attempt in (1, 3, 6, 50):
+            upper = min(50000, 1000 * 2**attempt)
+            times = [r.wait(attempt, 0) for _ in range(1000)]
+            self.assertGreaterEqual(min(times), 0)
+            self.assertLessEqual(max(times), upper)
+            self.assertTrue(min(times) < upper / 2 < max(times))
+
+    def test_random_sleep_seeded(self):
+        r1 = Retrying(wait_random_min=1000, wait_random_max=2000)
+        r2 = Retrying(wait_random_min=1000, wait_random_max=2000)
+        r1._rng.seed(0)
+        r2._rng.seed(0)
+        times = [r1.wait(1, 0) for _ in range(100)]
+        self.assertEqual(times, [r2.wait(1, 0) for _ in range(100)])
+
+    def test_random_generator_created_lazily(self):
+        r = Retrying(wait_random_min=1000, wait_random_max=2000, wait_jitter_max=100)
+        self.assertIsNone(r._random)
+        r.wait(1, 0)
+        self.assertIsNotNone(r._random)
+
+    def test_fibonacci_sleep(self):
+        r = Retrying(wait_fibonacci_multiplier=100, wait_fibonacci_max=2000)
+        self.assertEqual(r.wait(1, 0), 100)
+        self.assertEqual(r.wait(2, 0), 100)
+        self.assertEqual(r.wait(3, 0), 200)
+        self.assertEqual(r.wait(4, 0), 300)
+        self.assertEqual(r.wait(5, 0), 500)
+        self.assertEqual(r.wait(6, 0), 800)
+        self.assertEqual(r.wait(8, 0), 2000)
+        self.assertEqual(r.wait(1000, 0), 2000)
+
+    def test_fibonacci_sleep_many_attempts(self):
+        # 1000 * fib(11) = 89000 is the first wait past the 60000 max
+        self.assertEqual(11, _fib_attempt_cap(1000, 60000))
+        r = Retrying(wait_fibonacci_multiplier=1000, wait_fibonacci_max=60000)
+        _fib.cache_clear()
+        times = [r.wait(attempt, 0) for attempt in range(1, 30001)]
+        self.assertLessEqual(_fib.cache_info().currsize, 12)
+        self.assertEqual(times[:4], [1000, 1000, 2000, 3000])
+        self.assertEqual(times[-1], 60000)
+        self.assertEqual(Retrying(wait="fibonacci_sleep").wait(100000, 0), 1073741823)
+
+    def test_wait_max_delay(self):
+        r = Retrying(wait_exponential_multiplier=1000, wait_max_delay=5000)
+        self.assertEqual(r.wait(1, 0), 2000)
+        self.assertEqual(r.wait(2, 0), 4000)
+        self.assertEqual(r.wait(3, 0), 5000)
+        self.assertEqual(r.wait(50, 0), 5000)
 
-    def test_wait_func(self):
-        r = Retrying(wait_func=lambda attempt, delay: attempt * delay)
-        self.assertEqual(r.wait(1, 5), 5)
+        r = Retrying(wait_fixed=1000, wait_incrementing_start=500, wait_max_delay=1200)
+        self.assertEqual(r.wait(1, 0), 1000)
+        self.assertEqual(r.wait(8, 0), 1200)
+
+        r = Retrying(wait_func=lambda attempt, delay: attempt * delay, wait_max_delay=50)
         self.assertEqual(r.wait(2, 11), 22)
-        self.assertEqual(r.wait(10, 100), 1000)
+        self.assertEqual(r.wait(10, 100), 50)
 
+        r = Retrying(wait_fixed=1000, wait_max_delay=-1)
+        self.assertEqual(r.wait(1, 0), 0)
 
-class NoneReturnUntilAfterCount:
-    """
-    This class holds counter state for invoking a method several times in a row.
-    """
+    def test_wait_max_delay_with_jitter(self):
+        sleeps = []
 
-    def __init__(self, count):
-        self.counter = 0
-        self.count = count
-
-    def go(self):
-        """
-        Return None until after count threshold has been crossed, then return True.
-        """
-        if self.counter < self.count:
-            self.counter += 1
+        @retry(
+            wait_fixed=1000,
+            wait_jitter_max=5000,
+            wait_max_delay=1000,
+            stop_max_attempt_number=4,
+            retry_on_result=lambda r: r is None,
+            sleep_func=sleeps.append,
+        )
+        def _never():
             return None
-        return True
 
+        self.assertRaises(RetryError, _never)
+        self.assertEqual([1.0, 1.0, 1.0], sleeps)
+
+        sleeps.clear()
+        r = Retrying(
+            wait_fixed=1000,
+            wait_jitter_max=5000,
+            wait_max_delay=-1,
+            stop_max_attempt_number=2,
+            retry_on_result=lambda r: r is None,
+            sleep_func=sleeps.append,
+        )
+        self.assertRaises(RetryError, r.call, lambda: None)
+        self.assertEqual([0], sleeps)
 
-class NoIOErrorAfterCount:
-    """
-    This class holds counter state for invoking a method several times in a row.
-    """
+    def test_fixed_and_exponential_sleep(self):
+        r = Retrying(wait_fixed=10, wait_exponential_max=100000)
+        self.assertEqual(r.wait(1, 0), 10)
+        self.assertEqual(r.wait(3, 0), 10)
+        self.assertEqual(r.wait(4, 0), 16)
+        self.assertEqual(r.wait(5, 0), 32)
 
-    def __init__(self, count):
-        self.counter = 0
-        self.count = count
+    def test_legacy_explicit_wait_type(self):
+        Retrying(wait="exponential_sleep")
 
-    def go(self):
-        """
-        Raise an IOError until after count threshold has been crossed, then return True.
-        """
-        if self.counter < self.count:
-            self.counter += 1
-            raise IOError("Hi there, I'm an IOError")
-        return True
+    def test_wait_func(self):
+        r = Retrying(wait_func=lambda attempt, delay: attempt * delay)
+        self.assertEqual(r.wait(1, 5), 5)
+        self.assertEqual(r.wait(2, 11), 22)
+        self.assertEqual(r.wait(10, 100), 1000)
 
 
-class NoNameErrorAfterCount:
+class _CounterThing:
     """
     This class holds counter state for invoking a method several times in a row.
     """
 
-    def __init__(self, count):
+    __slots__ = ("counter", "count", "_action")
+
+    def __init__(self, count, action):
         self.counter = 0
         self.count = count
+        self._action = action
 
     def go(self):
         """
-        Raise a NameError until after count threshold has been crossed, then return True.
+        Perform the action until after count threshold has been crossed, then return True.
         """
         if self.counter < self.count:
             self.counter += 1
-            raise NameError("Hi there, I'm a NameError")
+            return self._action()
         return True
 
 
@@ -199,6 +295,8 @@ class CustomError(Exception):
     classes don't extend from the hierarchy.
     """
 
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
@@ -206,245 +304,328 @@ class CustomError(Exception):
         return repr(self.value)
 
 
-class NoCustomErrorAfterCount:
-    """
-    This class holds counter state for invoking a method several times in a row.
-    """
-
-    def __init__(self, count):
-        self.counter = 0
-        self.count = count
-
-    def go(self):
-        """
-        Raise a CustomError until after count threshold has been crossed, then return True.
-        """
-        if self.counter < self.count:
-            self.counter += 1
-            derived_message = "This is a Custom exception class"
-            raise CustomError(derived_message)
-        return True
+def _return_none():
+    return None
 
 
-def retry_if_result_none(result):
-    return result is None
+def _raise_io_error():
+    raise IOError("Hi there, I'm an IOError")
 
 
-def retry_if_exception_of_type(retryable_types):
-    def retry_if_exception_these_types(exception):
-        print(f"Detected Exception of type: {str(type(exception))}")
-        return isinstance(exception, retryable_types)
+def _raise_name_error():
+    raise NameError("Hi there, I'm a NameError")
 
-    return retry_if_exception_these_types
 
+def _raise_custom_error():
+    derived_message = "This is a Custom exception class"
+    raise CustomError(derived_message)
 
-def current_time_ms():
-    return int(round(time.time() * 1000))
 
+def NoneReturnUntilAfterCount(count):
+    """Return None until after count threshold has been crossed, then return True."""
+    return _CounterThing(count, _return_none)
 
-@retry(wait_fixed=50, retry_on_result=retry_if_result_none)
-def _retryable_test_with_wait(thing):
-    return thing.go()
 
+def NoIOErrorAfterCount(count):
+    """Raise an IOError until after count threshold has been crossed, then return True."""
+    return _CounterThing(count, _raise_io_error)
 
-@retry(stop_max_attempt_number=3, retry_on_result=retry_if_result_none)
-def _retryable_test_with_stop(thing):
-    return thing.go()
 
+def NoNameErrorAfterCount(count):
+    """Raise a NameError until after count threshold has been crossed, then return True."""
+    return _CounterThing(count, _raise_name_error)
 
-@retry(retry_on_exception=(IOError,))
-def _retryable_test_with_exception_type_io(thing):
-    return thing.go()
 
+def NoCustomErrorAfterCount(count):
+    """Raise a CustomError until after count threshold has been crossed, then return True."""
+    return _CounterThing(count, _raise_custom_error)
 
-@retry(retry_on_exception=retry_if_exception_of_type(IOError), wrap_exception=True)
-def _retryable_test_with_exception_type_io_wrap(thing):
-    return thing.go()
 
+def retry_if_result_none(result):
+    return result is None
 
-@retry(stop_max_attempt_number=3, retry_on_exception=(IOError,))
-def _retryable_test_with_exception_type_io_attempt_limit(thing):
-    return thing.go()
 
+# kept off the test_retrying logger that TestLogger records from
+_pred_logger = logging.getLogger(__name__ + ".predicates")
+_pred_logger.propagate = False
 
-@retry(stop_max_attempt_number=3, retry_on_exception=(IOError,), wrap_exception=True)
-def _retryable_test_with_exception_type_io_attempt_limit_wrap(thing):
-    return thing.go()
 
+@functools.lru_cache(maxsize=None)
+def retry_if_exception_of_type(retryable_types):
+    def retry_if_exception_these_types(exception):
+        _pred_logger.debug("Detected exception of type: %s", type(exception))
+        return isinstance(exception, retryable_types)
 
-@retry
-def _retryable_default(thing):
-    return thing.go()
+    return retry_if_exception_these_types
 
 
-@retry()
-def _retryable_default_f(thing):
-    return thing.go()
+class VirtualClock:
+    """
+    A fake clock that only moves forward when it is slept on, so retries with
+    long waits finish immediately.
+    """
 
+    __slots__ = ("now",)
 
-@retry(retry_on_exception=retry_if_exception_of_type(CustomError))
-def _retryable_test_with_exception_type_custom(thing):
-    return thing.go()
+    def __init__(self):
+        self.now = 0.0
 
+    def time(self):
+        return self.now
 
-@retry(retry_on_exception=retry_if_exception_of_type(CustomError), wrap_exception=True)
-def _retryable_test_with_exception_type_custom_wrap(thing):
-    return thing.go()
+    def sleep(self, seconds):
+        self.now += seconds
 
 
-@retry(
-    stop_max_attempt_number=3,
-    retry_on_exception=retry_if_exception_of_type(CustomError),
-)
-def _retryable_test_with_exception_type_custom_attempt_limit(thing):
+def _go(thing):
     return thing.go()
 
 
-@retry(
-    stop_max_attempt_number=3,
-    retry_on_exception=retry_if_exception_of_type(CustomError),
-    wrap_exception=True,
-)
-def _retryable_test_with_exception_type_custom_attempt_limit_wrap(thing):
-    return thing.go()
+# Options for each retrying function under test. These are only turned into
+# decorated functions in TestDecoratorWrapper.setUpClass, so that importing the
+# module doesn't have to build them. None means the bare @retry form.
+_SPECS = {
+    "with_stop": dict(stop_max_attempt_number=3, retry_on_result=retry_if_result_none),
+    "io": dict(retry_on_exception=(IOError,)),
+    "io_wrap": dict(
+        retry_on_exception=retry_if_exception_of_type(IOError), wrap_exception=True
+    ),
+    "io_attempt_limit": dict(stop_max_attempt_number=3, retry_on_exception=(IOError,)),
+    "io_attempt_limit_wrap": dict(
+        stop_max_attempt_number=3, retry_on_exception=(IOError,), wrap_exception=True
+    ),
+    "default": None,
+    "default_f": dict(),
+    "custom": dict(retry_on_exception=retry_if_exception_of_type(CustomError)),
+    "custom_wrap": dict(
+        retry_on_exception=retry_if_exception_of_type(CustomError),
+        wrap_exception=True,
+    ),
+    "custom_attempt_limit": dict(
+        stop_max_attempt_number=3,
+        retry_on_exception=retry_if_exception_of_type(CustomError),
+    ),
+    "custom_attempt_limit_wrap": dict(
+        stop_max_attempt_number=3,
+        retry_on_exception=retry_if_exception_of_type(CustomError),
+        wrap_exception=True,
+    ),
+}
 
 
 class TestDecoratorWrapper(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fns = {
+            name: retry(_go) if opts is None else retry(**opts)(_go)
+            for name, opts in _SPECS.items()
+        }
+
     def test_with_wait(self):
-        start = current_time_ms()
-        result = _retryable_test_with_wait(NoneReturnUntilAfterCount(5))
-        t = current_time_ms() - start
-        self.assertTrue(t >= 250)
+        clock = VirtualClock()
+
+        @retry(
+            wait_fixed=50,
+            retry_on_result=retry_if_result_none,
+            sleep_func=clock.sleep,
+            time_func=clock.time,
+        )
+        def _test_wait(thing):
+            return thing.go()
+
+        result = _test_wait(NoneReturnUntilAfterCount(5))
+        self.assertAlmostEqual(clock.time(), 0.25)
         self.assertTrue(result)
 
+    def test_with_stop_on_virtual_delay(self):
+        clock = VirtualClock()
+
+        @retry(
+            stop_max_delay=1000,
+            wait_fixed=300,
+            retry_on_result=retry_if_result_none,
+            sleep_func=clock.sleep,
+            time_func=clock.time,
+        )
+        def _test_delay(thing):
+            return thing.go()
+
+        try:
+            _test_delay(NoneReturnUntilAfterCount(10))
+            self.fail("Expected RetryError after 1000ms of virtual time")
+        except RetryError as re:
+            self.assertEqual(5, re.last_attempt.attempt_number)
+            self.assertAlmostEqual(clock.time(), 1.2)
+
     def test_with_stop_on_return_value(self):
         try:
-            _retryable_test_with_stop(NoneReturnUntilAfterCount(5))
+            self.fns["with_stop"](NoneReturnUntilAfterCount(5))
             self.fail("Expected RetryError after 3 attempts")
         except RetryError as re:
             self.assertFalse(re.last_attempt.has_exception)
             self.assertEqual(3, re.last_attempt.attempt_number)
-            self.assertTrue(re.last_attempt.value is None)
+            self.assertIsNone(re.last_attempt.value)
             print(re)
 
     def test_with_stop_on_exception(self):
         try:
-            _retryable_test_with_stop(NoIOErrorAfterCount(5))
+            self.fns["with_stop"](NoIOErrorAfterCount(5))
             self.fail("Expected IOError")
         except IOError as re:
-            self.assertTrue(isinstance(re, IOError))
+            self.assertIsInstance(re, IOError)
             print(re)
 
     def test_retry_if_exception_of_type(self):
-        self.assertTrue(_retryable_test_with_exception_type_io(NoIOErrorAfterCount(5)))
+        self.assertTrue(self.fns["io"](NoIOErrorAfterCount(5)))
 
         try:
-            _retryable_test_with_exception_type_io(NoNameErrorAfterCount(5))
+            self.fns["io"](NoNameErrorAfterCount(5))
             self.fail("Expected NameError")
         except NameError as n:
-            self.assertTrue(isinstance(n, NameError))
+            self.assertIsInstance(n, NameError)
             print(n)
 
         try:
-            _retryable_test_with_exception_type_io_attempt_limit_wrap(
-                NoIOErrorAfterCount(5)
-            )
+            self.fns["io_attempt_limit_wrap"](NoIOErrorAfterCount(5))
             self.fail("Expected RetryError")
         except RetryError as re:
             self.assertEqual(3, re.last_attempt.attempt_number)
             self.assertTrue(re.last_attempt.has_exception)
-            self.assertTrue(re.last_attempt.value[0] is not None)
-            self.assertTrue(isinstance(re.last_attempt.value[1], IOError))
-            self.assertTrue(re.last_attempt.value[2] is not None)
+            self.assertIsNotNone(re.last_attempt.value[0])
+            self.assertIsInstance(re.last_attempt.value[1], IOError)
+            self.assertIsNotNone(re.last_attempt.value[2])
             print(re)
 
-        self.assertTrue(
-            _retryable_test_with_exception_type_custom(NoCustomErrorAfterCount(5))
-        )
+        self.assertTrue(self.fns["custom"](NoCustomErrorAfterCount(5)))
 
         try:
-            _retryable_test_with_exception_type_custom(NoNameErrorAfterCount(5))
+            self.fns["custom"](NoNameErrorAfterCount(5))
             self.fail("Expected NameError")
         except NameError as n:
-            self.assertTrue(isinstance(n, NameError))
+            self.assertIsInstance(n, NameError)
             print(n)
 
         try:
-            _retryable_test_with_exception_type_custom_attempt_limit_wrap(
-                NoCustomErrorAfterCount(5)
-            )
+            self.fns["custom_attempt_limit_wrap"](NoCustomErrorAfterCount(5))
             self.fail("Expected RetryError")
         except RetryError as re:
             self.assertEqual(3, re.last_attempt.attempt_number)
             self.assertTrue(re.last_attempt.has_exception)
-            self.assertTrue(re.last_attempt.value[0] is not None)
-            self.assertTrue(isinstance(re.last_attempt.value[1], CustomError))
-            self.assertTrue(re.last_attempt.value[2] is not None)
+            self.assertIsNotNone(re.last_attempt.value[0])
+            self.assertIsInstance(re.last_attempt.value[1], CustomError)
+            self.assertIsNotNone(re.last_attempt.value[2])
             print(re)
 
+    def test_retry_on_base_exception_type_propagates(self):
+        calls = []
+
+        def _interrupt():
+            calls.append(1)
+            raise KeyboardInterrupt()
+
+        r = Retrying(
+            retry_on_exception=(KeyboardInterrupt,),
+            stop_max_attempt_number=3,
+            wait_fixed=0,
+        )
+        self.assertRaises(KeyboardInterrupt, r.call, _interrupt)
+        self.assertEqual(1, len(calls))
+
     def test_wrapped_exception(self):
 
         # base exception cases
-        self.assertTrue(
-            _retryable_test_with_exception_type_io_wrap(NoIOErrorAfterCount(5))
-        )
+        self.assertTrue(self.fns["io_wrap"](NoIOErrorAfterCount(5)))
 
         try:
-            _retryable_test_with_exception_type_io_wrap(NoNameErrorAfterCount(5))
+            self.fns["io_wrap"](NoNameErrorAfterCount(5))
             self.fail("Expected RetryError")
         except RetryError as re:
-            self.assertTrue(isinstance(re.last_attempt.value[1], NameError))
+            self.assertIsInstance(re.last_attempt.value[1], NameError)
             print(re)
 
         try:
-            _retryable_test_with_exception_type_io_attempt_limit_wrap(
-                NoIOErrorAfterCount(5)
-            )
+            self.fns["io_attempt_limit_wrap"](NoIOErrorAfterCount(5))
             self.fail("Expected RetryError")
         except RetryError as re:
             self.assertEqual(3, re.last_attempt.attempt_number)
             self.assertTrue(re.last_attempt.has_exception)
-            self.assertTrue(re.last_attempt.value[0] is not None)
-            self.assertTrue(isinstance(re.last_attempt.value[1], IOError))
-            self.assertTrue(re.last_attempt.value[2] is not None)
+            self.assertIsNotNone(re.last_attempt.value[0])
+            self.assertIsInstance(re.last_attempt.value[1], IOError)
+            self.assertIsNotNone(re.last_attempt.value[2])
             print(re)
 
         # custom error cases
-        self.assertTrue(
-            _retryable_test_with_exception_type_custom_wrap(NoCustomErrorAfterCount(5))
-        )
+        self.assertTrue(self.fns["custom_wrap"](NoCustomErrorAfterCount(5)))
 
         try:
-            _retryable_test_with_exception_type_custom_wrap(NoNameErrorAfterCount(5))
+            self.fns["custom_wrap"](NoNameErrorAfterCount(5))
             self.fail("Expected RetryError")
         except RetryError as re:
-            self.assertTrue(re.last_attempt.value[0] is not None)
-            self.assertTrue(isinstance(re.last_attempt.value[1], NameError))
-            self.assertTrue(re.last_attempt.value[2] is not None)
+            self.assertIsNotNone(re.last_attempt.value[0])
+            self.assertIsInstance(re.last_attempt.value[1], NameError)
+            self.assertIsNotNone(re.last_attempt.value[2])
             print(re)
 
         try:
-            _retryable_test_with_exception_type_custom_attempt_limit_wrap(
-                NoCustomErrorAfterCount(5)
-            )
+            self.fns["custom_attempt_limit_wrap"](NoCustomErrorAfterCount(5))
             self.fail("Expected RetryError")
         except RetryError as re:
             self.assertEqual(3, re.last_attempt.attempt_number)
             self.assertTrue(re.last_attempt.has_exception)
-            self.assertTrue(re.last_attempt.value[0] is not None)
-            self.assertTrue(isinstance(re.last_attempt.value[1], CustomError))
-            self.assertTrue(re.last_attempt.value[2] is not None)
+            self.assertIsNotNone(re.last_attempt.value[0])
+            self.assertIsInstance(re.last_attempt.value[1], CustomError)
+            self.assertIsNotNone(re.last_attempt.value[2])
 
-            self.assertTrue(
-                "This is a Custom exception class" in str(re.last_attempt.value[1])
+            self.assertIn(
+                "This is a Custom exception class", str(re.last_attempt.value[1])
             )
             print(re)
 
     def test_defaults(self):
-        self.assertTrue(_retryable_default(NoNameErrorAfterCount(5)))
-        self.assertTrue(_retryable_default_f(NoNameErrorAfterCount(5)))
-        self.assertTrue(_retryable_default(NoCustomErrorAfterCount(5)))
-        self.assertTrue(_retryable_default_f(NoCustomErrorAfterCount(5)))
+        self.assertTrue(self.fns["default"](NoNameErrorAfterCount(5)))
+        self.assertTrue(self.fns["default_f"](NoNameErrorAfterCount(5)))
+        self.assertTrue(self.fns["default"](NoCustomErrorAfterCount(5)))
+        self.assertTrue(self.fns["default_f"](NoCustomErrorAfterCount(5)))
+
+    def test_result_cache(self):
+        calls = []
+
+        @retry(cache=True, retry_on_result=retry_if_result_none)
+        def _cached(thing):
+            calls.append(thing)
+            return thing.go()
+
+        thing = NoneReturnUntilAfterCount(2)
+        self.assertTrue(_cached(thing))
+        self.assertEqual(2, thing.counter)
+        self.assertEqual(3, len(calls))
+
+        self.assertTrue(_cached(thing))
+        self.assertEqual(2, thing.counter)
+        self.assertEqual(3, len(calls))
+
+    def test_result_cache_unhashable(self):
+        calls = []
+
+        @retry(cache=True)
+        def _first(items):
+            calls.append(items)
+            return items[0]
+
+        self.assertEqual(1, _first([1]))
+        self.assertEqual(1, _first([1]))
+        self.assertEqual(2, len(calls))
+
+    def test_result_cache_type_error_from_function(self):
+        calls = []
+
+        @retry(cache=True, stop_max_attempt_number=1)
+        def _bad(value):
+            calls.append(value)
+            raise TypeError("not from hashing")
+
+        self.assertRaises(TypeError, _bad, 1)
+        self.assertEqual(1, len(calls))
 
 
 class TestBeforeAfterAttempts(unittest.TestCase):
@@ -462,7 +643,7 @@ class TestBeforeAfterAttempts(unittest.TestCase):
 
         _test_before()
 
-        self.assertTrue(TestBeforeAfterAttempts._attempt_number == 1)
+        self.assertEqual(1, TestBeforeAfterAttempts._attempt_number)
 
     def test_after_attempts(self):
         TestBeforeAfterAttempts._attempt_number = 0
@@ -470,7 +651,12 @@ class TestBeforeAfterAttempts(unittest.TestCase):
         def _after(attempt_number):
             TestBeforeAfterAttempts._attempt_number = attempt_number
 
-        @retry(wait_fixed=100, stop_max_attempt_number=3, after_attempts=_after)
+        @retry(
+            wait_fixed=100,
+            stop_max_attempt_number=3,
+            after_attempts=_after,
+            sleep_func=lambda seconds: None,
+        )
         def _test_after():
             if TestBeforeAfterAttempts._attempt_number < 2:
                 raise Exception("testing after_attempts handler")
@@ -479,7 +665,7 @@ class TestBeforeAfterAttempts(unittest.TestCase):
 
         _test_after()
 
-        self.assertTrue(TestBeforeAfterAttempts._attempt_number == 2)
+        self.assertEqual(2, TestBeforeAfterAttempts._attempt_number)
 
 
 class LoadTest(unittest.TestCase):
@@ -503,13 +689,22 @@ class LoadTest(unittest.TestCase):
         # Reset counter
         LoadTest.total_calls = 0
 
-        start_time = time.time()
-        end_time = start_time + duration_seconds
+        # Only check the clock every batch_size calls so that reading it doesn't
+        # dominate the loop being measured.
+        batch_size = 64
+        _now = time.perf_counter_ns
+        fn_to_test = self.fn_to_test
 
-        while time.time() < end_time:
-            _ = self.fn_to_test()
+        start_time = _now()
+        end_time = start_time + duration_seconds * 1_000_000_000
 
-        actual_duration = time.time() - start_time
+        while True:
+            for _ in itertools.repeat(None, batch_size):
+                fn_to_test()
+            if _now() >= end_time:
+                break
+
+        actual_duration = (_now() - start_time) / 1_000_000_000
 
         # Calculate metrics
         calls_per_second = LoadTest.total_calls / actual_duration
@@ -538,11 +733,26 @@ class LoadTest(unittest.TestCase):
 
 
 class TestLogger(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Share one dummy logger and handler across tests, rather than adding
+        # another handler to the same logger for every test
+        cls.logger = logging.getLogger("test_retrying")
+        for handler in cls.logger.handlers:
+            if isinstance(handler, cls.TestHandler):
+                cls.test_handler = handler
+                break
+        else:
+            cls.test_handler = cls.TestHandler()
+            cls.logger.addHandler(cls.test_handler)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.logger.removeHandler(cls.test_handler)
+
     def setUp(self):
         # Set up a function with a dummy logger
-        self.logger = logging.getLogger("test_retrying")
-        self.test_handler = self.TestHandler()
-        self.logger.addHandler(self.test_handler)
+        self.test_handler.records.clear()
         @retry(stop_max_attempt_number=1, retry_on_result=lambda r: r is None, logger=self.logger)
         def foo_with_logger():
             return None